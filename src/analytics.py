@@ -0,0 +1,162 @@
+"""Time-of-day analytics over the sessions frame.
+
+Sessions are split at every hour boundary (and so at every midnight) with
+array arithmetic rather than per-row Python, which keeps the views below
+fast on millions of sessions:
+
+- weekday x hour heatmap
+- per-client daily hours with rolling 7/28-day averages
+- per-client work streaks
+"""
+
+import numpy as np
+import pandas as pd
+from quotas import load_holidays
+from settings import CLIENT_QUOTAS
+
+US_PER_HOUR = 3_600_000_000
+HOURS_PER_DAY = 24
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+ROLLING_WINDOWS = (7, 28)
+
+
+def _to_us(series):
+    return series.to_numpy(dtype="datetime64[us]").astype(np.int64)
+
+
+def split_by_hour(start, end):
+    """Split [start, end) intervals (int64 microseconds) at hour boundaries.
+
+    Returns (row, hour, duration) arrays with one entry per piece: the index
+    of the source session, the absolute hour since the epoch and the piece
+    length in microseconds. Empty or inverted intervals yield no pieces.
+    """
+    first = start // US_PER_HOUR
+    last = (end - 1) // US_PER_HOUR
+    counts = np.where(end > start, last - first + 1, 0)
+
+    rows = np.repeat(np.arange(len(start)), counts)
+    # Position of each piece within its session: 0, 1, 2, ...
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    hours = first[rows] + offsets
+
+    piece_start = np.maximum(start[rows], hours * US_PER_HOUR)
+    piece_end = np.minimum(end[rows], (hours + 1) * US_PER_HOUR)
+    return rows, hours, piece_end - piece_start
+
+
+def hour_pieces(df):
+    """Split a sessions frame into per-hour pieces with client codes."""
+    codes, clients = pd.factorize(df["Client"])
+    rows, hours, duration = split_by_hour(_to_us(df["Start"]), _to_us(df["End"]))
+    return codes[rows], clients, hours, duration / US_PER_HOUR
+
+
+def weekday_hour_heatmap(df):
+    """Total hours per weekday (rows, Mon first) and hour of day (columns)."""
+    _, _, hours, duration = hour_pieces(df)
+    days = hours // HOURS_PER_DAY
+    # 1970-01-01 was a Thursday (weekday 3)
+    weekday = (days + 3) % 7
+    cells = weekday * HOURS_PER_DAY + hours % HOURS_PER_DAY
+    totals = np.bincount(cells, weights=duration, minlength=7 * HOURS_PER_DAY)
+    return pd.DataFrame(
+        totals.reshape(7, HOURS_PER_DAY), index=WEEKDAYS, columns=range(HOURS_PER_DAY)
+    )
+
+
+def daily_hours(df, end=None):
+    """Hours per client per calendar day, split at midnight.
+
+    Returns a (clients x days) frame covering every day from the first
+    session to `end` (default: the last session), zero-filled.
+    """
+    codes, clients, hours, duration = hour_pieces(df)
+    if not len(hours):
+        return pd.DataFrame()
+
+    days = hours // HOURS_PER_DAY
+    first_day = days.min()
+    last_day = days.max()
+    if end is not None:
+        end_day = np.datetime64(pd.Timestamp(end).date(), "D").astype(np.int64)
+        last_day = max(last_day, end_day)
+    n_days = last_day - first_day + 1
+
+    cells = codes * n_days + (days - first_day)
+    totals = np.bincount(cells, weights=duration, minlength=len(clients) * n_days)
+    dates = pd.to_datetime(np.arange(first_day, last_day + 1), unit="D")
+    return pd.DataFrame(
+        totals.reshape(len(clients), n_days), index=list(clients), columns=dates
+    )
+
+
+def rolling_averages(daily, windows=ROLLING_WINDOWS):
+    """Trailing N-day average of `daily` for each window, as a long frame.
+
+    Computed from a cumulative sum, so each window costs O(days) regardless
+    of its length. The first days of history average over the days so far.
+    """
+    values = daily.to_numpy()
+    cumulative = np.concatenate(
+        [np.zeros((values.shape[0], 1)), np.cumsum(values, axis=1)], axis=1
+    )
+    positions = np.arange(values.shape[1])
+
+    frames = []
+    for window in windows:
+        lower = np.maximum(positions + 1 - window, 0)
+        sums = cumulative[:, positions + 1] - cumulative[:, lower]
+        averages = sums / np.minimum(positions + 1, window)
+        frame = pd.DataFrame(averages, index=daily.index, columns=daily.columns)
+        frame = frame.stack().rename("Hours").reset_index()
+        frame.columns = ["Client", "Date", "Hours"]
+        frame["Window"] = f"{window}-day avg"
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _runs(flags):
+    """Lengths of the runs of True in a 1-D bool array, in order."""
+    padded = np.concatenate(([False], flags, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[1::2] - edges[::2]
+
+
+def work_streaks(daily, holidays=None):
+    """Current and longest streak of worked days per client.
+
+    Clients with a quota schedule only count their scheduled workdays
+    (weekends and holidays neither extend nor break a streak); others count
+    every calendar day. Today does not break the current streak yet.
+    """
+    if holidays is None:
+        holidays = load_holidays()
+    dates = daily.columns
+    weekday = dates.weekday.to_numpy()
+    is_holiday = np.isin(dates.date, list(holidays))
+    today = pd.Timestamp.now().normalize()
+
+    rows = []
+    for client, hours in daily.iterrows():
+        quota_cfg = CLIENT_QUOTAS.get(str(client).lower())
+        if quota_cfg:
+            scheduled = list(quota_cfg["weekly_schedule"])
+            mask = np.isin(weekday, scheduled) & (weekday < 5) & ~is_holiday
+        else:
+            mask = np.ones(len(dates), dtype=bool)
+
+        worked = hours.to_numpy()[mask] > 0
+        if len(worked) and dates[mask][-1] == today and not worked[-1]:
+            worked = worked[:-1]  # Today is still in progress
+
+        runs = _runs(worked)
+        rows.append(
+            {
+                "Client": client,
+                "Current": int(runs[-1]) if len(worked) and worked[-1] else 0,
+                "Longest": int(runs.max()) if len(runs) else 0,
+                "Days worked": int(worked.sum()),
+            }
+        )
+    return pd.DataFrame(rows, columns=["Client", "Current", "Longest", "Days worked"])
@@ -1,6 +1,8 @@
 # ttrack_csv_version.py with session recovery (no export button, fixed size)
 import sys
+import argparse
 import csv
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from PySide6.QtWidgets import (
@@ -14,29 +16,44 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QMessageBox,
 )
-from PySide6.QtCore import QTimer, Qt
+from PySide6.QtCore import QEvent, QLockFile, QThread, QTimer, Qt, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QSystemTrayIcon
 import subprocess
 import platform
 import webbrowser
-from generate_report import generate_report
 import hashlib
+import io
+import json
+import threading
 from datetime import date
 import shutil
 from PySide6.QtWidgets import QDialog, QDialogButtonBox, QFormLayout, QDateTimeEdit
 import os
 from PySide6.QtWidgets import QSpacerItem, QSizePolicy
+from PySide6.QtWidgets import QCheckBox, QDateEdit, QListWidget, QListWidgetItem
+import settings
+from filestate import complete_lines
 
 BACKUP_FOLDER = Path(".backups")
 BACKUP_FOLDER.mkdir(exist_ok=True)
+CACHE_FOLDER = Path(".cache")
+STARTUP_CACHE_FILE = CACHE_FOLDER / "startup.json"
 
-DATA_FILE = Path("sessions.csv")
+DATA_FILE = Path(settings.SESSIONS_FILE)
 RUNNING_FILE = Path("running_session.csv")
 HEARTBEAT_FILE = Path("last_seen.txt")
+PENDING_FILE = Path(settings.PENDING_WRITES_FILE)
+INSTANCE_LOCK_FILE = Path(settings.INSTANCE_LOCK_FILE)
 ICON_PATH = Path(__file__).parent / "icon_tt.ico"
 ICON_ON_PATH = Path(__file__).parent / "icon_on.ico"
 
+TICK_INTERVAL_MS = 1000  # live session label while the window is shown
+HIDDEN_TICK_INTERVAL_MS = 60 * 1000  # heartbeat only while hidden/minimised
+HEARTBEAT_INTERVAL = timedelta(minutes=1)
+WRITE_RETRY_DELAYS = (1, 2, 5, 10, 30)  # seconds, last one repeats
+
 
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and PyInstaller"""
@@ -44,6 +61,36 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def instance_server_name():
+    # One instance per data folder, the session files are relative to it
+    folder = str(Path.cwd().resolve()).encode()
+    return "ttrack-" + hashlib.md5(folder).hexdigest()[:12]
+
+
+def parse_command(argv):
+    parser = argparse.ArgumentParser(prog="ttrack")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--start", metavar="CLIENT", help="start tracking CLIENT")
+    group.add_argument("--stop", action="store_true", help="stop the running session")
+    args, _ = parser.parse_known_args(argv)  # Leave Qt's own options alone
+    if args.start:
+        return {"command": "start", "client": args.start}
+    if args.stop:
+        return {"command": "stop"}
+    return {"command": "show"}
+
+
+def send_to_running_instance(message, timeout_ms=200):
+    socket = QLocalSocket()
+    socket.connectToServer(instance_server_name())
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    socket.write((json.dumps(message) + "\n").encode())
+    socket.waitForBytesWritten(timeout_ms)
+    socket.disconnectFromServer()
+    return True
+
+
 def backup_sessions_csv(tag=""):
     if not DATA_FILE.exists():
         return
@@ -81,26 +128,119 @@ def load_sessions():
     return sessions
 
 
+def parse_session_rows(data):
+    """Parse CSV bytes into session dicts, skipping the header if present."""
+    reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    return [
+        {"client": row[0], "start": row[1], "end": row[2]}
+        for row in reader
+        if row and row[0] != "Client"
+    ]
+
+
+def load_sessions_from(offset):
+    """Load the sessions appended after byte `offset` of sessions.csv."""
+    if not DATA_FILE.exists():
+        return []
+    with open(DATA_FILE, "rb") as f:
+        f.seek(offset)
+        return parse_session_rows(f.read())
+
+
+def read_last_session():
+    """Read only the last record of sessions.csv by seeking back from EOF."""
+    if not DATA_FILE.exists():
+        return None
+    with open(DATA_FILE, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        lines = []
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            lines = tail.rstrip(b"\r\n").splitlines()
+            if len(lines) > 1:
+                break
+    sessions = parse_session_rows(lines[-1]) if lines else []
+    return sessions[-1] if sessions else None
+
+
+def file_signature():
+    stat = DATA_FILE.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def save_startup_cache(sessions, signature):
+    """Cache the client list and the sessions the today/week/month totals need."""
+    first_of_month = date.today().replace(day=1)
+    cutoff = (first_of_month - timedelta(days=1)).replace(day=1).isoformat()
+    cache = {
+        "signature": signature,
+        "clients": sorted({s["client"] for s in sessions}),
+        "recent": [s for s in sessions if s["start"] >= cutoff],
+    }
+    CACHE_FOLDER.mkdir(exist_ok=True)
+    tmp_file = STARTUP_CACHE_FILE.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(cache))
+    os.replace(tmp_file, STARTUP_CACHE_FILE)
+
+
+def load_startup_cache():
+    """Return the startup cache if it still matches sessions.csv, else None."""
+    if not DATA_FILE.exists() or not STARTUP_CACHE_FILE.exists():
+        return None
+    try:
+        cache = json.loads(STARTUP_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+    if cache.get("signature") != file_signature():
+        return None
+    return cache
+
+
 def get_csv_hash():
     if not DATA_FILE.exists():
         return None
     return hashlib.md5(DATA_FILE.read_bytes()).hexdigest()
 
 
-def append_session(client, start, end):
+def append_sessions(rows):
+    """Append (client, start, end) rows of ISO strings in one fsynced write."""
     write_header = not DATA_FILE.exists()
     with open(DATA_FILE, "a", newline="") as f:
         writer = csv.writer(f)
         if write_header:
             writer.writerow(["Client", "Start", "End"])
-        writer.writerow([client, start.isoformat(), end.isoformat()])
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def replace_last_session(client, start, end):
+    with open(DATA_FILE, newline="") as f:
+        all_rows = list(csv.DictReader(f))
+    if not all_rows:
+        return
+
+    all_rows[-1] = {"Client": client, "Start": start, "End": end}
+
+    tmp_file = DATA_FILE.with_suffix(".tmp")
+    with open(tmp_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Client", "Start", "End"])
+        writer.writeheader()
+        writer.writerows(all_rows)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, DATA_FILE)
 
 
 def save_running_session(client, start):
     with open(RUNNING_FILE, "w", newline="") as f:
         writer = csv.writer(f)
         writer.writerow(["Client", "Start"])
-        writer.writerow([client, start.isoformat()])
+        writer.writerow([client, start])
 
 
 def load_running_session():
@@ -113,8 +253,8 @@ def load_running_session():
     return None
 
 
-def save_heartbeat():
-    HEARTBEAT_FILE.write_text(datetime.now().isoformat())
+def save_heartbeat(at):
+    HEARTBEAT_FILE.write_text(at)
 
 
 def load_heartbeat():
@@ -130,6 +270,26 @@ def clear_session_state():
         HEARTBEAT_FILE.unlink()
 
 
+def load_pending_writes():
+    if not PENDING_FILE.exists():
+        return []
+    with open(PENDING_FILE) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_pending_writes(ops):
+    if not ops:
+        if PENDING_FILE.exists():
+            PENDING_FILE.unlink()
+        return
+    tmp_file = PENDING_FILE.with_suffix(".tmp")
+    with open(tmp_file, "w") as f:
+        f.writelines(json.dumps(op) + "\n" for op in ops)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, PENDING_FILE)
+
+
 def validate_sessions(sessions):
     errors = []
     for i, s in enumerate(sessions):
@@ -143,6 +303,235 @@ def validate_sessions(sessions):
     return errors
 
 
+def compute_totals(sessions, client, now):
+    """Sum the finished sessions of `client` for today, this week and this month."""
+    total_today = timedelta()
+    total_week = timedelta()
+    total_month = timedelta()
+    start_of_week = now - timedelta(days=now.weekday())
+    start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for s in sessions:
+        if s["client"] != client:
+            continue
+        start = datetime.fromisoformat(s["start"])
+        end = datetime.fromisoformat(s["end"])
+        duration = end - start
+
+        if start.date() == now.date():
+            total_today += duration
+        if start >= start_of_week:
+            total_week += duration
+        if start.year == now.year and start.month == now.month:
+            total_month += duration
+
+    return total_today, total_week, total_month
+
+
+def next_day_boundary(now):
+    # Week and month boundaries always fall on a midnight, so the next
+    # midnight is the next moment any aggregate can roll over.
+    tomorrow = now.date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time())
+
+
+class StartupLoader(QThread):
+    """Does the full-history part of startup off the GUI thread."""
+
+    loaded = Signal(object)
+
+    def run(self):
+        backup_sessions_csv()
+        cleanup_old_backups()
+        # Imported here, pandas/pyarrow would slow down every launch
+        from snapshot import refresh_snapshot
+
+        try:
+            # Keep the report's columnar snapshot warm
+            refresh_snapshot()
+        except Exception:
+            pass  # Only a cache, the report rebuilds it
+
+        data = b""
+        signature = None
+        if DATA_FILE.exists():
+            signature = file_signature()
+            data = DATA_FILE.read_bytes()
+            if len(data) != signature[0]:
+                signature = None  # Appended while reading, don't cache
+            data = complete_lines(data)  # The rest is read on swap-in
+
+        sessions = parse_session_rows(data)
+        errors = validate_sessions(sessions)
+        if signature and not errors:
+            save_startup_cache(sessions, signature)
+
+        self.loaded.emit(
+            {
+                "sessions": sessions,
+                "errors": errors,
+                "csv_hash": hashlib.md5(data).hexdigest() if data else None,
+                "offset": len(data),
+            }
+        )
+
+
+class SessionWriter(QThread):
+    """Single writer for the session files, fed by a durable ordered queue.
+
+    The GUI thread only submits operations. They are journaled to
+    pending_writes.jsonl, applied in order (consecutive appends batched into
+    one fsynced write) and retried with backoff while sessions.csv is locked,
+    e.g. open in Excel. Whatever is left at exit is replayed on next start.
+    """
+
+    pending_changed = Signal(int)
+    committed = Signal()  # sessions.csv changed on disk
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = threading.Condition()
+        # Held while sessions.csv is written and the written ops are dequeued,
+        # so readers see every session either in the file or still pending.
+        self.file_lock = threading.Lock()
+        self.pending = load_pending_writes()
+        self.stopping = False
+
+    def submit(self, op, **args):
+        with self.queue:
+            # Only the latest heartbeat matters
+            if op == "heartbeat" and self.pending and self.pending[-1]["op"] == op:
+                self.pending.pop()
+            self.pending.append({"op": op, **args})
+            self.queue.notify()
+
+    def snapshot(self):
+        with self.queue:
+            return list(self.pending)
+
+    def apply_pending(self, sessions):
+        """Return `sessions` (as read from disk) with the queued edits applied."""
+        sessions = list(sessions)
+        for op in self.snapshot():
+            session = {k: op[k] for k in ("client", "start", "end") if k in op}
+            if op["op"] == "append":
+                sessions.append(session)
+            elif op["op"] == "replace_last" and sessions:
+                sessions[-1] = session
+        return sessions
+
+    def stop(self, timeout_ms=2000):
+        with self.queue:
+            self.stopping = True
+            self.queue.notify()
+        self.wait(timeout_ms)
+
+    def run(self):
+        failures = 0
+        while True:
+            with self.queue:
+                while not self.pending and not self.stopping:
+                    self.queue.wait()
+                if not self.pending:
+                    return
+                batch = list(self.pending)
+
+            save_pending_writes(batch)
+            try:
+                self.apply(batch)
+            except OSError:
+                failures += 1
+                save_pending_writes(self.snapshot())
+                self.pending_changed.emit(len(self.snapshot()))
+                delay = WRITE_RETRY_DELAYS[min(failures, len(WRITE_RETRY_DELAYS)) - 1]
+                with self.queue:
+                    if self.stopping:
+                        return  # Journaled, replayed on next start
+                    self.queue.wait_for(lambda: self.stopping, timeout=delay)
+                continue
+
+            remaining = self.snapshot()
+            save_pending_writes(remaining)
+            # Heartbeats and session state do not touch sessions.csv
+            if any(op["op"] in ("append", "replace_last") for op in batch):
+                self.committed.emit()
+            if failures:
+                failures = 0
+                self.pending_changed.emit(len(remaining))
+
+    def apply(self, batch):
+        i = 0
+        while i < len(batch):
+            op = batch[i]
+            count = 1
+            with self.file_lock:
+                if op["op"] == "append":
+                    while i + count < len(batch) and batch[i + count]["op"] == "append":
+                        count += 1
+                    append_sessions(
+                        [
+                            (o["client"], o["start"], o["end"])
+                            for o in batch[i : i + count]
+                        ]
+                    )
+                elif op["op"] == "replace_last":
+                    replace_last_session(op["client"], op["start"], op["end"])
+                elif op["op"] == "running":
+                    save_running_session(op["client"], op["start"])
+                elif op["op"] == "heartbeat":
+                    save_heartbeat(op["at"])
+                elif op["op"] == "clear":
+                    clear_session_state()
+                with self.queue:
+                    del self.pending[:count]
+            i += count
+
+
+class InstanceServer(QLocalServer):
+    """Receives the commands of later launches.
+
+    It listens from right after the instance lock is taken, while the window
+    may still be in its constructor (e.g. the "Recover session?" dialog), so
+    commands are queued until a handler is set.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.handler = None
+        self.queued = []
+        self.newConnection.connect(self.on_connection)
+
+    def start(self):
+        name = instance_server_name()
+        # We hold the instance lock, so a leftover socket is from a crash
+        QLocalServer.removeServer(name)
+        self.listen(name)
+
+    def set_handler(self, handler):
+        self.handler = handler
+        queued, self.queued = self.queued, []
+        for message in queued:
+            handler(message)
+
+    def on_connection(self):
+        while self.hasPendingConnections():
+            socket = self.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self.read_message(s))
+            socket.disconnected.connect(socket.deleteLater)
+            self.read_message(socket)  # May have arrived already
+
+    def read_message(self, socket):
+        while socket.canReadLine():
+            try:
+                message = json.loads(bytes(socket.readLine()).decode())
+            except ValueError:
+                continue
+            if self.handler:
+                self.handler(message)
+            else:
+                self.queued.append(message)
+
+
 class EditLastEntryDialog(QDialog):
     def __init__(self, parent, last_entry):
         super().__init__(parent)
@@ -180,22 +569,126 @@ class EditLastEntryDialog(QDialog):
         }
 
 
+class ReportDialog(QDialog):
+    def __init__(self, parent, clients):
+        super().__init__(parent)
+        self.setWindowTitle("Stats Report")
+        self.setMinimumWidth(300)
+
+        layout = QFormLayout()
+
+        self.client_list = QListWidget()
+        for name in clients:
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.client_list.addItem(item)
+
+        self.all_time = QCheckBox("All time")
+        self.all_time.setChecked(True)
+
+        today = date.today()
+        self.start_edit = QDateEdit(today.replace(day=1))
+        self.start_edit.setCalendarPopup(True)
+        self.start_edit.setDisplayFormat("yyyy-MM-dd")
+
+        self.end_edit = QDateEdit(today)
+        self.end_edit.setCalendarPopup(True)
+        self.end_edit.setDisplayFormat("yyyy-MM-dd")
+
+        self.all_time.toggled.connect(self.start_edit.setDisabled)
+        self.all_time.toggled.connect(self.end_edit.setDisabled)
+        self.start_edit.setDisabled(True)
+        self.end_edit.setDisabled(True)
+
+        from generate_report import GRANULARITIES
+
+        granularity_layout = QHBoxLayout()
+        self.granularity_boxes = {}
+        for name in GRANULARITIES:
+            box = QCheckBox(name.capitalize())
+            box.setChecked(True)
+            granularity_layout.addWidget(box)
+            self.granularity_boxes[name] = box
+
+        layout.addRow("Clients:", self.client_list)
+        layout.addRow("", self.all_time)
+        layout.addRow("From:", self.start_edit)
+        layout.addRow("To:", self.end_edit)
+        layout.addRow("Totals per:", granularity_layout)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        # An empty selection would mean "no filter" further down, and an
+        # inverted range an empty report
+        self.ok_button = buttons.button(QDialogButtonBox.Ok)
+        self.client_list.itemChanged.connect(self.update_ok_button)
+        self.all_time.toggled.connect(self.update_ok_button)
+        self.start_edit.dateChanged.connect(self.update_ok_button)
+        self.end_edit.dateChanged.connect(self.update_ok_button)
+        self.update_ok_button()
+
+        layout.addWidget(buttons)
+        self.setLayout(layout)
+
+    def checked_clients(self):
+        items = [self.client_list.item(i) for i in range(self.client_list.count())]
+        return [item.text() for item in items if item.checkState() == Qt.Checked]
+
+    def update_ok_button(self):
+        clients_ok = bool(self.checked_clients()) or not self.client_list.count()
+        range_ok = (
+            self.all_time.isChecked()
+            or self.start_edit.date() <= self.end_edit.date()
+        )
+        self.ok_button.setEnabled(clients_ok and range_ok)
+
+    def get_report_options(self):
+        checked = self.checked_clients()
+        all_time = self.all_time.isChecked()
+        return {
+            # No filter at all is cheaper than listing every client
+            "clients": None if len(checked) == self.client_list.count() else checked,
+            "start": None if all_time else self.start_edit.date().toPython(),
+            "end": None if all_time else self.end_edit.date().toPython(),
+            "granularity": tuple(
+                name for name, box in self.granularity_boxes.items() if box.isChecked()
+            ),
+        }
+
+
 class TimeTracker(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("TT")
-        backup_sessions_csv()
-        cleanup_old_backups()
 
         self.setWindowIcon(QIcon(str(ICON_PATH)))
         self.tray_icon = QSystemTrayIcon(self)
         self.tray_icon.setIcon(QIcon(str(ICON_PATH)))
 
         # self.setWindowIcon(QIcon("icon_tt.ico"))
-        self.heartbeat_counter = 0
+        self.last_heartbeat = None
+        self.base_totals = (timedelta(), timedelta(), timedelta())
+        self.totals_date = None  # Day base_totals were computed for
         # self.tray_icon.setIcon(QIcon("icon_tt.ico"))
         self.tray_icon.setVisible(True)
 
+        self.writes_blocked = False
+        self.deferred_commands = []
+        self.writer = SessionWriter(self)
+        self.writer.pending_changed.connect(self.on_pending_writes)
+        self.writer.start()
+
+        self.sync_worker = None
+        if settings.SYNC_URL:
+            from sync import SyncWorker
+
+            self.sync_worker = SyncWorker(settings.SYNC_URL, settings.SYNC_INTERVAL)
+            self.sync_worker.start()
+            # Push fresh sessions once they are on disk
+            self.writer.committed.connect(self.sync_worker.kick)
+
         # self.setFixedSize(300, 270)
 
         self.setStyleSheet("""
@@ -226,17 +719,15 @@ class TimeTracker(QWidget):
             }
         """)
 
-        self.sessions = load_sessions()
-        errors = validate_sessions(self.sessions)
-        if errors:
-            QMessageBox.critical(
-                self,
-                "CSV Error",
-                "⚠️ Invalid session data found:\n\n" + "\n".join(errors),
-            )
-            self.sessions = []  # or keep the valid ones only
+        # Tiered startup: paint from the cached rollups and the last record,
+        # the full history is loaded by StartupLoader and swapped in later.
+        cache = load_startup_cache()
+        last_session = read_last_session()
+        self.sessions = cache["recent"] if cache else []
+        self.sessions_loaded = False
+        self.totals_ready = cache is not None
 
-        self.csv_hash = get_csv_hash()
+        self.csv_hash = None
         self.current_client = None
         self.start_time = None
 
@@ -250,13 +741,14 @@ class TimeTracker(QWidget):
         # self.client_dropdown = QComboBox()
         # self.client_dropdown.addItems(sorted(set(s["client"] for s in self.sessions)))
         self.client_dropdown = QComboBox()
-        clients = [s["client"] for s in self.sessions]
-        unique_clients = sorted(set(clients))
-        self.client_dropdown.addItems(unique_clients)
+        unique_clients = set(cache["clients"]) if cache else set()
+        if last_session:
+            unique_clients.add(last_session["client"])
+        self.client_dropdown.addItems(sorted(unique_clients))
 
         # Preselect the most recent client if sessions exist
-        if clients:
-            self.client_dropdown.setCurrentText(clients[-1])
+        if last_session:
+            self.client_dropdown.setCurrentText(last_session["client"])
 
         self.client_dropdown.currentTextChanged.connect(self.select_client)
         self.add_client_input = QLineEdit()
@@ -281,10 +773,17 @@ class TimeTracker(QWidget):
 
         self.setLayout(layout)
 
-        self.timer = QTimer()
-        self.timer.setInterval(1000)
-        self.timer.timeout.connect(self.update_ui)
-        self.timer.start()
+        # Ticks only drive the live session label (and the heartbeat); they
+        # run while a session is live and slow down while the window is hidden.
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.CoarseTimer)
+        self.timer.timeout.connect(self.tick)
+
+        # Aggregates are recomputed on data changes and when the day rolls over.
+        self.boundary_timer = QTimer(self)
+        self.boundary_timer.setSingleShot(True)
+        self.boundary_timer.timeout.connect(self.on_boundary)
+        self.schedule_boundary_refresh()
 
         self.recover_session()
 
@@ -375,7 +874,9 @@ class TimeTracker(QWidget):
         self.edit_button.setToolTip(
             "Open sessions.csv in Excel or your default editor."
         )
-        self.stats_button.setToolTip("Generate and open the interactive stats report.")
+        self.stats_button.setToolTip(
+            "Generate and open the interactive stats report for chosen clients and dates."
+        )
         self.reload_button.setToolTip(
             "Reload sessions from CSV (use after manual edits)."
         )
@@ -393,10 +894,63 @@ class TimeTracker(QWidget):
         layout.addItem(QSpacerItem(20, 20, QSizePolicy.Minimum, QSizePolicy.Expanding))
         layout.addLayout(button_hlayout)
 
+        # Need the full history, enabled once it is loaded
+        self.edit_last_button.setEnabled(False)
+        self.reload_button.setEnabled(False)
+
         if self.client_dropdown.count():
             self.select_client(self.client_dropdown.currentText())
             QTimer.singleShot(0, self.update_ui)
 
+        self.loader = StartupLoader(self)
+        self.loader.loaded.connect(self.on_history_loaded)
+        self.loader.start()
+
+    def on_history_loaded(self, result):
+        sessions = result["sessions"]
+        if result["errors"]:
+            QMessageBox.critical(
+                self,
+                "CSV Error",
+                "⚠️ Invalid session data found:\n\n" + "\n".join(result["errors"]),
+            )
+            sessions = []  # or keep the valid ones only
+
+        # Sessions written while the loader was reading sit past its offset,
+        # the ones not written yet are still queued
+        with self.writer.file_lock:
+            delta = load_sessions_from(result["offset"])
+            self.sessions = self.writer.apply_pending(sessions + delta)
+        self.csv_hash = result["csv_hash"]
+        self.sessions_loaded = True
+        self.totals_ready = True
+
+        # Add the clients the cache did not know about but keep the selection,
+        # re-selecting would stop a session started in the meantime
+        known = {
+            self.client_dropdown.itemText(i)
+            for i in range(self.client_dropdown.count())
+        }
+        clients = known | {s["client"] for s in self.sessions}
+        self.client_dropdown.blockSignals(True)
+        self.client_dropdown.clear()
+        self.client_dropdown.addItems(sorted(clients))
+        if self.current_client:
+            self.client_dropdown.setCurrentText(self.current_client)
+        self.client_dropdown.blockSignals(False)
+
+        self.edit_last_button.setEnabled(True)
+        self.reload_button.setEnabled(True)
+        self.update_ui()
+
+    def closeEvent(self, event):
+        self.writer.stop()
+        if self.sync_worker:
+            self.sync_worker.stop()
+        if self.sessions_loaded and DATA_FILE.exists():
+            save_startup_cache(self.sessions, file_signature())
+        super().closeEvent(event)
+
     def refresh_client_dropdown(self):
         clients = [s["client"] for s in self.sessions]
         unique_clients = sorted(set(clients))
@@ -423,7 +977,8 @@ class TimeTracker(QWidget):
 
         new_hash = get_csv_hash()
         if new_hash != self.csv_hash:
-            self.sessions = load_sessions()
+            with self.writer.file_lock:
+                self.sessions = self.writer.apply_pending(load_sessions())
             self.csv_hash = new_hash
             self.refresh_client_dropdown()
             self.update_ui()
@@ -435,9 +990,19 @@ class TimeTracker(QWidget):
 
     def recover_session(self):
         recovered = load_running_session()
+        last_seen = load_heartbeat()
+        # State writes the last run could not finish are still journaled
+        for op in self.writer.snapshot():
+            if op["op"] == "running":
+                recovered = op["client"], datetime.fromisoformat(op["start"])
+            elif op["op"] == "heartbeat":
+                last_seen = datetime.fromisoformat(op["at"])
+            elif op["op"] == "clear":
+                recovered, last_seen = None, None
+
         if recovered:
             client, start = recovered
-            last_seen = load_heartbeat() or datetime.now()
+            last_seen = last_seen or datetime.now()
             elapsed = last_seen - start
             minutes = int(elapsed.total_seconds() / 60)
 
@@ -449,16 +1014,31 @@ class TimeTracker(QWidget):
             )
 
             if reply == QMessageBox.Yes:
-                append_session(client, start, last_seen)
-                self.sessions.append(
-                    {
-                        "client": client,
-                        "start": start.isoformat(),
-                        "end": last_seen.isoformat(),
-                    }
-                )
+                self.record_session(client, start, last_seen)
+
+            self.writer.submit("clear")
 
-            clear_session_state()
+    def record_session(self, client, start, end):
+        session = {"client": client, "start": start.isoformat(), "end": end.isoformat()}
+        self.writer.submit("append", **session)
+        self.sessions.append(session)
+
+    def on_pending_writes(self, count):
+        if count:
+            self.tray_icon.setToolTip(
+                f"{count} pending write(s), sessions.csv is locked. Retrying…"
+            )
+            if not self.writes_blocked:
+                self.tray_icon.showMessage(
+                    "File Locked",
+                    "sessions.csv is open (e.g., in Excel).\n"
+                    "Your sessions are kept and will be saved once it is closed.",
+                )
+        else:
+            self.tray_icon.setToolTip(
+                "Timer running…" if self.start_time else "Timer stopped"
+            )
+        self.writes_blocked = bool(count)
 
     def add_client(self):
         name = self.add_client_input.text().strip()
@@ -471,15 +1051,8 @@ class TimeTracker(QWidget):
 
     def select_client(self, name):
         if self.start_time:
-            end_time = datetime.now()
-            append_session(self.current_client, self.start_time, end_time)
-            self.sessions.append(
-                {
-                    "client": self.current_client,
-                    "start": self.start_time.isoformat(),
-                    "end": end_time.isoformat(),
-                }
-            )
+            self.record_session(self.current_client, self.start_time, datetime.now())
+            self.writer.submit("clear")
             self.start_time = None
             self.timer_button.setText("Start")
             self.timer_button.setStyleSheet("background-color: #28a745; color: white;")
@@ -492,87 +1065,62 @@ class TimeTracker(QWidget):
             return
 
         if self.start_time:
-            end_time = datetime.now()
-            try:
-                append_session(self.current_client, self.start_time, end_time)
-            except PermissionError:
-                QMessageBox.warning(
-                    self,
-                    "File Locked",
-                    "sessions.csv is open (e.g., in Excel).\nPlease close it and stop the timer again.",
-                )
-                return  # Don't end session
-            else:
-                self.setWindowIcon(QIcon(str(ICON_PATH)))
-                self.tray_icon.setIcon(QIcon(str(ICON_PATH)))
+            # Queued, the writer retries in the background if the file is locked
+            self.record_session(self.current_client, self.start_time, datetime.now())
+            self.writer.submit("clear")
+
+            self.setWindowIcon(QIcon(str(ICON_PATH)))
+            self.tray_icon.setIcon(QIcon(str(ICON_PATH)))
+            if not self.writes_blocked:
                 self.tray_icon.setToolTip("Timer stopped")
-                self.tray_icon.show()
-                clear_session_state()
-                self.sessions.append(
-                    {
-                        "client": self.current_client,
-                        "start": self.start_time.isoformat(),
-                        "end": end_time.isoformat(),
-                    }
-                )
-                self.start_time = None
-                self.timer_button.setText("Start")
-                self.timer_button.setStyleSheet(
-                    "background-color: #28a745; color: white;"
-                )
+            self.tray_icon.show()
+            self.start_time = None
+            self.timer_button.setText("Start")
+            self.timer_button.setStyleSheet("background-color: #28a745; color: white;")
 
         else:
             self.setWindowIcon(QIcon(str(ICON_ON_PATH)))
             self.tray_icon.setIcon(QIcon(str(ICON_ON_PATH)))
-            self.tray_icon.setToolTip("Timer running…")
+            if not self.writes_blocked:
+                self.tray_icon.setToolTip("Timer running…")
             self.tray_icon.show()
 
             self.start_time = datetime.now()
-            save_running_session(self.current_client, self.start_time)
-            save_heartbeat()
+            self.writer.submit(
+                "running", client=self.current_client, start=self.start_time.isoformat()
+            )
+            self.writer.submit("heartbeat", at=self.start_time.isoformat())
+            self.last_heartbeat = self.start_time
             self.timer_button.setText("Stop")
             self.timer_button.setStyleSheet("background-color: #dc3545; color: white;")
 
         self.update_ui()
 
-    def update_ui(self):
-        if self.start_time:
-            self.heartbeat_counter += 1
-            if self.heartbeat_counter >= 60:  # once per minute
-                save_heartbeat()
-                self.heartbeat_counter = 0
+    def is_shown(self):
+        return self.isVisible() and not self.isMinimized()
 
+    def update_ui(self):
+        """Recompute the aggregates after a data change and redraw all labels."""
+        if self.current_client:
+            now = datetime.now()
+            self.base_totals = compute_totals(self.sessions, self.current_client, now)
+            self.totals_date = now.date()
+        self.render_totals()
+        self.render_session_label()
+        self.schedule_ticks()
+
+    def render_totals(self):
         if not self.current_client:
             self.time_label.setText("No client selected.")
-            self.session_label.setText("Session: 0h 0m 0s")
             return
+        if not self.totals_ready:
+            self.time_label.setText("<span style='font-size:11px;'>Loading…</span>")
+            return
+        if self.catch_up_day_change():
+            return  # Rendered by the refresh
 
-        total_today = timedelta()
-        total_week = timedelta()
-        total_month = timedelta()
-        now = datetime.now()
-        start_of_week = now - timedelta(days=now.weekday())
-        start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        for s in self.sessions:
-            if s["client"] != self.current_client:
-                continue
-            start = datetime.fromisoformat(s["start"])
-            end = datetime.fromisoformat(s["end"])
-            duration = end - start
-
-            if start.date() == now.date():
-                total_today += duration
-            if start >= start_of_week:
-                total_week += duration
-            if start.year == now.year and start.month == now.month:
-                total_month += duration
-
-        if self.start_time:
-            live = datetime.now() - self.start_time
-            total_today += live
-            total_week += live
-            total_month += live
+        live = datetime.now() - self.start_time if self.start_time else timedelta()
+        total_today, total_week, total_month = (t + live for t in self.base_totals)
 
         def fmt(td):
             return f"{td.total_seconds() / 3600:.1f}h"
@@ -585,7 +1133,8 @@ class TimeTracker(QWidget):
             f"</span>"
         )
 
-        if self.start_time:
+    def render_session_label(self):
+        if self.current_client and self.start_time:
             hours, remainder = divmod(
                 int((datetime.now() - self.start_time).total_seconds()), 3600
             )
@@ -594,6 +1143,107 @@ class TimeTracker(QWidget):
         else:
             self.session_label.setText("Session: 0h 0m 0s")
 
+    def schedule_ticks(self):
+        if not self.start_time:
+            self.timer.stop()
+            return
+
+        interval = TICK_INTERVAL_MS if self.is_shown() else HIDDEN_TICK_INTERVAL_MS
+        if not self.timer.isActive() or self.timer.interval() != interval:
+            self.timer.start(interval)
+
+    def tick(self):
+        if not self.start_time:
+            self.timer.stop()
+            return
+        self.catch_up_day_change()
+
+        now = datetime.now()
+        shown = self.is_shown()
+        # While hidden every tick is a heartbeat tick.
+        if not shown or now - self.last_heartbeat >= HEARTBEAT_INTERVAL:
+            self.writer.submit("heartbeat", at=now.isoformat())
+            self.last_heartbeat = now
+            # Totals are shown with 0.1h resolution, once a minute is plenty.
+            if shown:
+                self.render_totals()
+
+        if shown:
+            self.render_session_label()
+
+    def schedule_boundary_refresh(self):
+        now = datetime.now()
+        delay = next_day_boundary(now) - now
+        # A second of slack so the refresh lands after midnight, not before.
+        self.boundary_timer.start(int(delay.total_seconds() * 1000) + 1000)
+
+    def on_boundary(self):
+        self.update_ui()
+        self.schedule_boundary_refresh()
+
+    def catch_up_day_change(self):
+        """Refresh now if the day changed but the boundary timer has not fired.
+
+        The timer runs on a monotonic clock that stops during suspend, so after
+        sleeping past midnight it fires late.
+        """
+        if self.current_client and self.totals_date != date.today():
+            self.on_boundary()
+            return True
+        return False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Labels were not redrawn while hidden; catch up before ticking again.
+        if not self.catch_up_day_change():
+            self.update_ui()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.schedule_ticks()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            if self.is_shown():
+                self.render_totals()
+                self.render_session_label()
+            self.schedule_ticks()
+
+    def handle_command(self, message):
+        """Run a command line forwarded by a second launch (or our own)."""
+        modal = QApplication.activeModalWidget()
+        if modal is not None or self.deferred_commands:
+            # Starting or stopping records a session, which would race with a
+            # dialog editing the sessions; run it once the dialog is closed,
+            # after the commands already waiting
+            self.deferred_commands.append(message)
+            if modal is not None:
+                modal.finished.connect(
+                    lambda: QTimer.singleShot(0, self.run_deferred_commands)
+                )
+            return
+
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
+        if message.get("command") == "start":
+            client = message["client"]
+            if self.client_dropdown.findText(client) < 0:
+                self.client_dropdown.addItem(client)
+            # Switching client logs the running session, like in the UI
+            self.client_dropdown.setCurrentText(client)
+            if not self.start_time:
+                self.toggle_timer()
+        elif message.get("command") == "stop" and self.start_time:
+            self.toggle_timer()
+
+    def run_deferred_commands(self):
+        commands, self.deferred_commands = self.deferred_commands, []
+        for message in commands:
+            self.handle_command(message)  # Deferred again if a dialog is open
+
     def open_csv_file(self):
         file_path = str(DATA_FILE.resolve())
 
@@ -605,8 +1255,17 @@ class TimeTracker(QWidget):
             subprocess.run(["xdg-open", file_path])
 
     def open_stats_report(self):
-        generate_report()
-        report_path = Path("report.html").resolve()
+        clients = [
+            self.client_dropdown.itemText(i)
+            for i in range(self.client_dropdown.count())
+        ]
+        dialog = ReportDialog(self, clients)
+        if dialog.exec() != QDialog.Accepted:
+            return
+
+        from generate_report import generate_report
+
+        report_path = generate_report(**dialog.get_report_options()).resolve()
         if report_path.exists():
             webbrowser.open(str(report_path))
         else:
@@ -622,6 +1281,14 @@ class TimeTracker(QWidget):
         last_entry = self.sessions[-1]
         dialog = EditLastEntryDialog(self, last_entry)
         if dialog.exec() == QDialog.Accepted:
+            if not self.sessions or self.sessions[-1] != last_entry:
+                QMessageBox.warning(
+                    self,
+                    "Entry Changed",
+                    "A new session was recorded while editing, nothing was saved.",
+                )
+                return
+
             edited = dialog.get_edited_values()
             if edited["end"] <= edited["start"]:
                 QMessageBox.warning(
@@ -629,37 +1296,43 @@ class TimeTracker(QWidget):
                 )
                 return
 
-            # Update CSV in-place
-            all_rows = []
-            with open(DATA_FILE, newline="") as f:
-                reader = csv.DictReader(f)
-                all_rows = list(reader)
-
-            if not all_rows:
-                QMessageBox.warning(self, "Error", "CSV appears empty.")
-                return
-
-            all_rows[-1] = {
-                "Client": edited["client"],
-                "Start": edited["start"].isoformat(),
-                "End": edited["end"].isoformat(),
+            # The writer rewrites the CSV, the in-memory copy is updated now
+            session = {
+                "client": edited["client"],
+                "start": edited["start"].isoformat(),
+                "end": edited["end"].isoformat(),
             }
-
-            with open(DATA_FILE, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=["Client", "Start", "End"])
-                writer.writeheader()
-                writer.writerows(all_rows)
-
-            self.sessions = load_sessions()
-            self.csv_hash = get_csv_hash()
+            self.writer.submit("replace_last", **session)
+            self.sessions[-1] = session
             self.refresh_client_dropdown()
             self.update_ui()
             QMessageBox.information(self, "Saved", "Last entry updated.")
 
 
 if __name__ == "__main__":
+    command = parse_command(sys.argv[1:])
+
+    # Only one instance may own the session files. Stale locks of crashed
+    # instances are detected by PID, so the lock never expires by age.
+    instance_lock = QLockFile(str(INSTANCE_LOCK_FILE))
+    instance_lock.setStaleLockTime(0)
+    if not instance_lock.tryLock(0):
+        # Hand the command over; retry briefly in case the owner is starting
+        for _ in range(10):
+            if send_to_running_instance(command):
+                sys.exit(0)
+            time.sleep(0.1)
+        sys.exit("ttrack is already running but does not respond.")
+
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon(str(ICON_PATH)))
+    instance_server = InstanceServer()
+    instance_server.start()
     win = TimeTracker()
     win.show()
-    sys.exit(app.exec())
+    instance_server.set_handler(win.handle_command)
+    if command["command"] != "show":
+        QTimer.singleShot(0, lambda: win.handle_command(command))
+    exit_code = app.exec()
+    instance_lock.unlock()
+    sys.exit(exit_code)
@@ -0,0 +1,299 @@
+"""Compact sessions.csv: merge fragmented sessions, roll up old detail.
+
+Switching clients or stopping and restarting the timer leaves many tiny,
+adjacent rows. Compaction streams the file once and
+
+- merges back-to-back sessions of the same client on the same day whose
+  gap is at most `gap`. The merged row keeps the first start and the summed
+  duration, so no idle gap time is added to the totals;
+- optionally moves rows older than `archive_months` full months to
+  sessions_archive.csv and replaces them with one summary row per client
+  and day. The cutoff is recorded next to the archive, so a later run
+  knows the rows before it are summaries and does not archive them again.
+
+Per-client daily totals are compared before and after, so the report's
+day/week/month totals cannot change. The file is backed up and replaced
+atomically. ttrack must be closed, as it owns the session files.
+
+    python compaction.py --gap 120 --archive-months 12
+"""
+
+import argparse
+import csv
+import json
+import os
+import shutil
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from PySide6.QtCore import QLockFile
+from settings import (
+    ARCHIVE_FILE,
+    INSTANCE_LOCK_FILE,
+    PENDING_WRITES_FILE,
+    SESSIONS_FILE,
+)
+
+BACKUP_FOLDER = Path(".backups")
+DEFAULT_GAP = timedelta(minutes=1)
+COLUMNS = ["Client", "Start", "End"]
+
+
+class CompactionError(Exception):
+    pass
+
+
+def archive_cutoff(months, today=None):
+    """First day of the month `months` months before the current one."""
+    today = today or date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_rows(reader, stats):
+    """Yield (client, start, end, raw); start/end are None for invalid rows."""
+    for raw in reader:
+        if not raw:
+            continue
+        stats["rows_before"] += 1
+        try:
+            start = datetime.fromisoformat(raw[1])
+            end = datetime.fromisoformat(raw[2])
+        except (IndexError, ValueError):
+            start = end = None
+        if start is not None and end <= start:
+            start = end = None  # Left exactly as found
+        yield raw[0], start, end, raw
+
+
+def cutoff_file(archive_path):
+    return Path(archive_path).with_suffix(".json")
+
+
+def load_archived_before(archive_path):
+    """Cutoff of the last archiving run; rows before it are summaries."""
+    try:
+        data = json.loads(cutoff_file(archive_path).read_text())
+        return date.fromisoformat(data["archived_before"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_archived_before(archive_path, cutoff):
+    path = cutoff_file(archive_path)
+    tmp_file = path.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps({"archived_before": cutoff.isoformat()}))
+    os.replace(tmp_file, path)
+
+
+def roll_up(rows, cutoff, archive_writer, stats, archived_before=None):
+    """Archive rows that start before `cutoff`, yield one summary per client/day.
+
+    Rows before `archived_before` are summaries of an earlier run: they are
+    re-aggregated but not archived again.
+    """
+    day = None
+    totals = {}  # client -> [first start, duration]
+
+    def summaries():
+        for client, (first, duration) in totals.items():
+            yield client, first, first + duration, None
+
+    for client, start, end, raw in rows:
+        if start is None or start.date() >= cutoff:
+            yield from summaries()
+            totals.clear()
+            yield client, start, end, raw
+            continue
+
+        if archived_before is None or start.date() >= archived_before:
+            archive_writer.writerow(raw)
+            stats["archived"] += 1
+        if start.date() != day:
+            yield from summaries()
+            totals.clear()
+            day = start.date()
+        if client in totals:
+            totals[client][1] += end - start
+        else:
+            totals[client] = [start, end - start]
+    yield from summaries()
+
+
+def merge_adjacent(rows, gap, stats):
+    """Merge back-to-back sessions of the same client on the same day."""
+    current = None  # [client, start, duration, last end, raw]
+
+    def flush():
+        client, start, duration, _, raw = current
+        if raw is not None:
+            return raw  # Untouched rows keep their exact text
+        return [client, start.isoformat(), (start + duration).isoformat()]
+
+    for client, start, end, raw in rows:
+        if (
+            current is not None
+            and start is not None
+            and client == current[0]
+            and start.date() == current[1].date()
+            and timedelta(0) <= start - current[3] <= gap
+        ):
+            current[2] += end - start
+            current[3] = end
+            current[4] = None
+            stats["merged"] += 1
+            continue
+
+        if current is not None:
+            yield flush()
+            current = None
+        if start is None:
+            yield raw
+        else:
+            current = [client, start, end - start, end, raw]
+    if current is not None:
+        yield flush()
+
+
+def daily_totals(rows):
+    totals = defaultdict(timedelta)
+    for row in rows:
+        try:
+            start = datetime.fromisoformat(row[1])
+            end = datetime.fromisoformat(row[2])
+        except (IndexError, ValueError):
+            continue
+        if end > start:
+            totals[row[0], start.date()] += end - start
+    return totals
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
+
+def compact_sessions(
+    gap=DEFAULT_GAP,
+    archive_months=None,
+    dry_run=False,
+    path=SESSIONS_FILE,
+    archive_path=ARCHIVE_FILE,
+):
+    """Compact `path` in place and return before/after statistics."""
+    path = Path(path)
+    archive_path = Path(archive_path)
+    tmp_file = path.with_suffix(".compact.tmp")
+    archive_tmp_file = archive_path.with_suffix(".compact.tmp")
+    stats = {
+        "rows_before": 0,
+        "rows_after": 0,
+        "merged": 0,
+        "archived": 0,
+        "bytes_before": path.stat().st_size,
+    }
+
+    with open(path, newline="") as src, open(tmp_file, "w", newline="") as out, open(
+        archive_tmp_file, "w", newline=""
+    ) as archive_out:
+        reader = csv.reader(src)
+        header = next(reader, None) or COLUMNS
+        writer = csv.writer(out)
+        writer.writerow(header)
+
+        rows = parse_rows(reader, stats)
+        archived_before = load_archived_before(archive_path)
+        if archive_months is not None:
+            cutoff = archive_cutoff(archive_months)
+            rows = roll_up(
+                rows, cutoff, csv.writer(archive_out), stats, archived_before
+            )
+        for row in merge_adjacent(rows, gap, stats):
+            writer.writerow(row)
+            stats["rows_after"] += 1
+        out.flush()
+        os.fsync(out.fileno())
+
+    stats["bytes_after"] = tmp_file.stat().st_size
+    try:
+        if daily_totals(read_rows(path)) != daily_totals(read_rows(tmp_file)):
+            raise CompactionError("Per-day totals changed, sessions.csv left as is.")
+        if dry_run:
+            return stats
+
+        BACKUP_FOLDER.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime("%Y-%m-%d_compact-%H%M%S%f")
+        shutil.copy2(path, BACKUP_FOLDER / f"sessions_{stamp}.csv")
+
+        # Archive first: a crash in between duplicates detail, never loses it
+        if stats["archived"]:
+            write_header = not archive_path.exists()
+            with open(archive_path, "a", newline="") as archive, open(
+                archive_tmp_file, newline=""
+            ) as archived:
+                if write_header:
+                    csv.writer(archive).writerow(COLUMNS)
+                shutil.copyfileobj(archived, archive)
+                archive.flush()
+                os.fsync(archive.fileno())
+        # Then the cutoff: a crash before the replace leaves detail rows that
+        # are already archived to be rolled up, never summaries to archive
+        if archive_months is not None and (
+            archived_before is None or cutoff > archived_before
+        ):
+            save_archived_before(archive_path, cutoff)
+        os.replace(tmp_file, path)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+        archive_tmp_file.unlink(missing_ok=True)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact sessions.csv.")
+    parser.add_argument(
+        "--gap",
+        type=float,
+        default=DEFAULT_GAP.total_seconds(),
+        help="merge same-client sessions at most this many seconds apart",
+    )
+    parser.add_argument(
+        "--archive-months",
+        type=int,
+        help="roll up detail older than N full months into per-day rows",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    # ttrack owns the session files while it runs
+    instance_lock = QLockFile(INSTANCE_LOCK_FILE)
+    instance_lock.setStaleLockTime(0)
+    if not instance_lock.tryLock(0):
+        raise SystemExit("ttrack is running, close it before compacting.")
+    try:
+        if Path(PENDING_WRITES_FILE).exists():
+            raise SystemExit(
+                "ttrack has unsaved writes from its last run, "
+                "start it once so they are flushed, then compact."
+            )
+        stats = compact_sessions(
+            timedelta(seconds=args.gap), args.archive_months, args.dry_run
+        )
+    finally:
+        instance_lock.unlock()
+
+    saved = (
+        1 - stats["bytes_after"] / stats["bytes_before"] if stats["bytes_before"] else 0
+    )
+    print(
+        f"{'Would compact' if args.dry_run else '✅ Compacted'} {SESSIONS_FILE}: "
+        f"{stats['rows_before']} → {stats['rows_after']} rows, "
+        f"{stats['bytes_before'] / 1024:.0f} KB → {stats['bytes_after'] / 1024:.0f} KB "
+        f"(-{saved:.0%}), {stats['merged']} merged, {stats['archived']} archived"
+    )
+
+
+if __name__ == "__main__":
+    main()
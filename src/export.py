@@ -0,0 +1,311 @@
+"""Per-client, per-period timesheet export (CSV, JSON, XLSX).
+
+Sessions are streamed from sessions.csv through a chain of generators
+(read -> filter -> round -> timesheet lines), so memory stays bounded by
+one period of one client no matter how long the history is.
+
+    python export.py --client sandisk --from 2026-10-01 --to 2026-10-31
+    python export.py --all --period week --format xlsx --round 15 --subtotals
+"""
+
+import argparse
+import csv
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from quotas import expected_hours, load_holidays
+from settings import SESSIONS_FILE
+
+EXPORT_FOLDER = Path("exports")
+FORMATS = ("csv", "json", "xlsx")
+PERIODS = ("week", "month")
+ROUNDING_MODES = ("nearest", "up", "down")
+COLUMNS = ["Type", "Date", "Start", "End", "Hours", "Expected", "Difference"]
+
+
+class ExportError(Exception):
+    pass
+
+
+# ----- Pipeline stages -----
+
+
+def read_sessions(path=SESSIONS_FILE):
+    """Yield (client, start, end) tuples one row at a time."""
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                yield (
+                    row["Client"],
+                    datetime.fromisoformat(row["Start"]),
+                    datetime.fromisoformat(row["End"]),
+                )
+            except (TypeError, ValueError) as e:
+                # A timesheet silently missing a session is worse than none
+                raise ExportError(
+                    f"{path} line {reader.line_num}: invalid session ({e}); "
+                    "fix the row and export again."
+                )
+
+
+def filter_sessions(rows, client=None, start_date=None, end_date=None):
+    wanted = client.lower() if client else None
+    for row in rows:
+        day = row[1].date()
+        if wanted and row[0].lower() != wanted:
+            continue
+        if start_date and day < start_date:
+            continue
+        if end_date and day > end_date:
+            continue
+        yield row
+
+
+def round_hours(hours, minutes, mode="nearest"):
+    if not minutes:
+        return hours
+    steps = hours * 60 / minutes
+    if mode == "up":
+        steps = math.ceil(steps - 1e-9)
+    elif mode == "down":
+        steps = math.floor(steps + 1e-9)
+    else:
+        steps = math.floor(steps + 0.5)
+    return steps * minutes / 60
+
+
+def with_hours(rows, rounding=None):
+    """Attach the (optionally rounded) billable hours to each session."""
+    minutes, mode = rounding or (0, "nearest")
+    for client, start, end in rows:
+        hours = (end - start).total_seconds() / 3600
+        yield client, start, end, round_hours(hours, minutes, mode)
+
+
+def period_start(day, period):
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start, period):
+    if period == "week":
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def period_label(start, period):
+    if period == "week":
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    return start.strftime("%Y-%m")
+
+
+def group_by_period(rows, period):
+    """Yield (period_start, sessions) with each period's sessions sorted by start.
+
+    Only the current period is buffered. sessions.csv is append-only, so a
+    session for an already emitted period means the file was reordered by
+    hand; that is reported instead of silently splitting the timesheet.
+    """
+    current = None
+    buffer = []
+    done = set()
+    for row in rows:
+        key = period_start(row[1].date(), period)
+        if key != current:
+            if key in done:
+                raise ExportError(
+                    f"sessions.csv is not in chronological order near {row[1]}; "
+                    "sort it by Start and export again."
+                )
+            if buffer:
+                done.add(current)
+                yield current, sorted(buffer, key=lambda r: r[1])
+            current, buffer = key, []
+        buffer.append(row)
+    if buffer:
+        yield current, sorted(buffer, key=lambda r: r[1])
+
+
+def timesheet_lines(client, sessions, first_day, last_day, subtotals, holidays):
+    """Yield timesheet rows for one period: sessions, day subtotals, total."""
+
+    def expected(start, end):
+        return expected_hours(start, end, client, holidays)
+
+    def summary(kind, label, hours, target):
+        return {
+            "Type": kind,
+            "Date": label,
+            "Start": "",
+            "End": "",
+            "Hours": round(hours, 2),
+            "Expected": round(target, 2),
+            "Difference": round(hours - target, 2),
+        }
+
+    total = 0.0
+    day, day_hours = None, 0.0
+    for _, start, end, hours in sessions:
+        if subtotals and day is not None and start.date() != day:
+            yield summary("day", day.isoformat(), day_hours, expected(day, day))
+            day_hours = 0.0
+        day = start.date()
+        day_hours += hours
+        total += hours
+        yield {
+            "Type": "session",
+            "Date": day.isoformat(),
+            "Start": start.strftime("%H:%M:%S"),
+            "End": end.strftime("%H:%M:%S"),
+            "Hours": round(hours, 2),
+            "Expected": "",
+            "Difference": "",
+        }
+    if subtotals and day is not None:
+        yield summary("day", day.isoformat(), day_hours, expected(day, day))
+    yield summary("total", "", total, expected(first_day, last_day))
+
+
+# ----- Writers -----
+
+
+def write_csv(path, client, label, lines):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(lines)
+
+
+def write_json(path, client, label, lines):
+    # Written incrementally so a long period never sits in memory twice
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'{{"client": {json.dumps(client)}, "period": "{label}", "lines": [')
+        for i, line in enumerate(lines):
+            f.write(("," if i else "") + "\n  " + json.dumps(line))
+        f.write("\n]}\n")
+
+
+def write_xlsx(path, client, label, lines):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportError("XLSX export needs openpyxl (pip install openpyxl).")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=label)
+    sheet.append([f"Timesheet {client} {label}"])
+    sheet.append(COLUMNS)
+    for line in lines:
+        sheet.append([line[column] for column in COLUMNS])
+    workbook.save(path)
+
+
+WRITERS = {"csv": write_csv, "json": write_json, "xlsx": write_xlsx}
+
+
+# ----- Export -----
+
+
+def export_client(
+    client,
+    start_date=None,
+    end_date=None,
+    period="month",
+    fmt="csv",
+    rounding=None,
+    subtotals=False,
+    source=SESSIONS_FILE,
+    out_dir=EXPORT_FOLDER,
+):
+    """Write one timesheet per period for `client`, return the written paths."""
+    if fmt not in WRITERS:
+        raise ExportError(f"Unknown format '{fmt}', expected one of {FORMATS}.")
+    if period not in PERIODS:
+        raise ExportError(f"Unknown period '{period}', expected one of {PERIODS}.")
+
+    end_date = end_date or date.today()
+    holidays = load_holidays()
+
+    rows = filter_sessions(read_sessions(source), client, start_date, end_date)
+    rows = with_hours(rows, rounding)
+
+    written = []
+    for first_day, sessions in group_by_period(rows, period):
+        label = period_label(first_day, period)
+        # The filter ignores case, files are named as the CSV spells the client
+        name = sessions[0][0]
+        client_dir = Path(out_dir) / name
+        client_dir.mkdir(parents=True, exist_ok=True)
+        # Expected hours only count the part of the period inside the range
+        last_day = min(period_end(first_day, period), end_date)
+        first_day = max(first_day, start_date) if start_date else first_day
+        lines = timesheet_lines(
+            name, sessions, first_day, last_day, subtotals, holidays
+        )
+        path = client_dir / f"{name}_{label}.{fmt}"
+        WRITERS[fmt](path, name, label, lines)
+        written.append(path)
+    return written
+
+
+def list_clients(source=SESSIONS_FILE):
+    return sorted({client for client, _, _ in read_sessions(source)})
+
+
+def export_all(clients=None, workers=None, **options):
+    """Export every client (or the given ones) in parallel worker processes."""
+    clients = clients or list_clients(options.get("source", SESSIONS_FILE))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            client: pool.submit(export_client, client, **options) for client in clients
+        }
+        return {client: future.result() for client, future in futures.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export per-client timesheets.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--client", action="append", help="client to export")
+    target.add_argument("--all", action="store_true", help="export every client")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat)
+    parser.add_argument("--to", dest="end", type=date.fromisoformat)
+    parser.add_argument("--period", choices=PERIODS, default="month")
+    parser.add_argument("--format", dest="fmt", choices=FORMATS, default="csv")
+    parser.add_argument("--round", type=int, default=0, help="round to N minutes")
+    parser.add_argument("--round-mode", choices=ROUNDING_MODES, default="nearest")
+    parser.add_argument("--subtotals", action="store_true", help="daily subtotals")
+    parser.add_argument("--out", type=Path, default=EXPORT_FOLDER)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    options = dict(
+        start_date=args.start,
+        end_date=args.end,
+        period=args.period,
+        fmt=args.fmt,
+        rounding=(args.round, args.round_mode) if args.round else None,
+        subtotals=args.subtotals,
+        out_dir=args.out,
+    )
+    clients = None if args.all else args.client
+    try:
+        if clients and len(clients) == 1:
+            results = {clients[0]: export_client(clients[0], **options)}
+        else:
+            results = export_all(clients, workers=args.workers, **options)
+    except ExportError as e:
+        raise SystemExit(str(e))
+
+    for client, paths in results.items():
+        folder = paths[0].parent if paths else args.out / client
+        print(f"✅ {client}: {len(paths)} timesheet(s) in {folder.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Change detection for append-mostly files such as sessions.csv.
+
+Readers that consume a file incrementally remember how far they got, a
+hash of that prefix and the file's size and mtime. While size and mtime
+are unchanged nothing needs reading; otherwise the prefix hash tells an
+append (only new bytes past the mark) from any other edit.
+
+Kept free of third-party imports so the GUI thread can use it cheaply.
+"""
+
+import hashlib
+import os
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def fingerprint(f, offset):
+    """Hash the first `offset` bytes of the binary file `f`."""
+    digest = hashlib.md5()
+    f.seek(0)
+    remaining = offset
+    while remaining > 0:
+        chunk = f.read(min(remaining, HASH_CHUNK_BYTES))
+        if not chunk:
+            break
+        digest.update(chunk)
+        remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def complete_lines(data):
+    """Cut `data` after its last newline.
+
+    The writer may be mid-append; the half-written last row is picked up by
+    the next incremental read, which starts at the returned length.
+    """
+    return data[: data.rfind(b"\n") + 1]
+
+
+def file_stat(f):
+    """[size, mtime_ns] of the open file `f`, to skip hashing unchanged files."""
+    st = os.fstat(f.fileno())
+    return [st.st_size, st.st_mtime_ns]
@@ -1,55 +1,85 @@
-from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import pandas as pd
 import plotly.express as px
-from settings import CLIENT_QUOTAS, HOLIDAY_FILE
+from analytics import daily_hours, rolling_averages, weekday_hour_heatmap, work_streaks
+from quotas import expected_hours
+from snapshot import load_sessions_frame, refresh_snapshot
+from sync import load_rollups
 
+REPORT_FILE = "report.html"
+GRANULARITIES = ("day", "week", "month")
 
-def generate_report():
-    df = pd.read_csv("sessions.csv", parse_dates=["Start", "End"])
+
+def add_duration(df):
     df["Duration"] = (df["End"] - df["Start"]).dt.total_seconds() / 3600
     df["Date"] = df["Start"].dt.date
-    df["Week"] = df["Start"].dt.to_period("W").apply(lambda r: r.start_time)
-    df["Month"] = df["Start"].dt.to_period("M").apply(lambda r: r.start_time)
+    return df
+
+
+def generate_report(
+    clients=None,
+    start=None,
+    end=None,
+    granularity=GRANULARITIES,
+    output_path=REPORT_FILE,
+):
+    """Write the HTML report for a slice of the history and return its path.
+
+    `clients` (names, case-insensitive; None for all) and the inclusive
+    `start`/`end` dates select the slice, which is read directly from the
+    snapshot index rather than filtered out of the full history.
+    `granularity` picks which of the day/week/month total charts to draw.
+    """
+    df = add_duration(load_sessions_frame(clients=clients, start=start, end=end))
+    df["Week"] = df["Start"].dt.to_period("W").dt.start_time
+    df["Month"] = df["Start"].dt.to_period("M").dt.start_time
     df["Weekday"] = df["Start"].dt.weekday
 
     chart_height = 500
+    figs = []
 
     # ----- Plot 1: Daily totals -----
-    per_day = df.groupby(["Client", "Date"])["Duration"].sum().reset_index()
-    fig_day = px.bar(
-        per_day,
-        x="Date",
-        y="Duration",
-        color="Client",
-        title="Total Hours per Client per Day",
-        labels={"Duration": "Hours"},
-        height=chart_height,
-    )
+    if "day" in granularity:
+        per_day = df.groupby(["Client", "Date"])["Duration"].sum().reset_index()
+        fig_day = px.bar(
+            per_day,
+            x="Date",
+            y="Duration",
+            color="Client",
+            title="Total Hours per Client per Day",
+            labels={"Duration": "Hours"},
+            height=chart_height,
+        )
+        figs.append(fig_day)
 
     # ----- Plot 2: Weekly totals -----
-    weekly = df.groupby(["Client", "Week"])["Duration"].sum().reset_index()
-    fig_weekly = px.bar(
-        weekly,
-        x="Week",
-        y="Duration",
-        color="Client",
-        title="Total Hours per Client per Week",
-        labels={"Duration": "Hours"},
-        height=chart_height,
-    )
+    if "week" in granularity:
+        weekly = df.groupby(["Client", "Week"])["Duration"].sum().reset_index()
+        fig_weekly = px.bar(
+            weekly,
+            x="Week",
+            y="Duration",
+            color="Client",
+            title="Total Hours per Client per Week",
+            labels={"Duration": "Hours"},
+            height=chart_height,
+        )
+        figs.append(fig_weekly)
 
     # ----- Plot 3: Monthly totals -----
-    monthly = df.groupby(["Client", "Month"])["Duration"].sum().reset_index()
-    fig_monthly = px.bar(
-        monthly,
-        x="Month",
-        y="Duration",
-        color="Client",
-        title="Total Hours per Client per Month",
-        labels={"Duration": "Hours"},
-        height=chart_height,
-    )
+    if "month" in granularity:
+        monthly = df.groupby(["Client", "Month"])["Duration"].sum().reset_index()
+        fig_monthly = px.bar(
+            monthly,
+            x="Month",
+            y="Duration",
+            color="Client",
+            title="Total Hours per Client per Month",
+            labels={"Duration": "Hours"},
+            height=chart_height,
+        )
+        figs.append(fig_monthly)
 
     # ----- Plot 4: Average per Day -----
     days_worked = df.groupby("Client")["Date"].nunique()
@@ -64,6 +94,47 @@ def generate_report():
         labels={"AvgHoursPerDay": "Avg Hours"},
         height=chart_height,
     )
+    figs.append(fig_avg)
+
+    # ----- Plot 5: Weekday x hour heatmap -----
+    fig_heatmap = px.imshow(
+        weekday_hour_heatmap(df),
+        title="Total Hours by Weekday and Hour of Day",
+        labels={"x": "Hour of Day", "y": "", "color": "Hours"},
+        aspect="auto",
+        height=chart_height,
+    )
+    figs.append(fig_heatmap)
+
+    # ----- Plot 6: Rolling averages -----
+    daily = daily_hours(df, end=end or pd.Timestamp.now())
+    fig_rolling = px.line(
+        rolling_averages(daily),
+        x="Date",
+        y="Hours",
+        color="Client",
+        line_dash="Window",
+        title="Rolling Average Hours per Day (7 / 28 days)",
+        height=chart_height,
+    )
+    figs.append(fig_rolling)
+
+    # ----- Work streaks -----
+    streaks_html = ""
+    if not daily.empty:
+        streaks_html = f"""
+        <div class='summary-title'>Work Streaks (scheduled days)</div>
+        {work_streaks(daily).to_html(index=False, border=0, classes="streaks")}
+        """
+
+    # ----- Other machines (pulled by sync.py) -----
+    machines_html = ""
+    machines = other_machine_hours(clients, start, end)
+    if not machines.empty:
+        machines_html = f"""
+        <div class='summary-title'>Other Machines (as of the last sync)</div>
+        {machines.to_html(index=False, border=0, classes="streaks")}
+        """
 
     # ----- Quota Summary -----
     def progress_bar(actual, target):
@@ -83,44 +154,23 @@ def generate_report():
         </div>
         """
 
-    def expected_hours(start_date, end_date, client):
-        quota_cfg = CLIENT_QUOTAS.get(client.lower())
-        if not quota_cfg:
-            return 0
-
-        weekly_quota = quota_cfg["weekly_schedule"]
-        workdays = pd.bdate_range(start=start_date, end=end_date).to_series().dt.date
-
-        holidays = set()
-        holidays_path = Path(HOLIDAY_FILE)
-        if holidays_path.exists():
-            with open(holidays_path) as f:
-                holidays = {
-                    datetime.strptime(line.strip().split()[0], "%Y-%m-%d").date()
-                    for line in f
-                    if line.strip() and not line.startswith("#")
-                }
-
-        total = 0.0
-        for day in workdays:
-            if day in holidays:
-                continue
-            weekday = day.weekday()
-            if weekday in weekly_quota:
-                total += weekly_quota[weekday]
-
-        return total
-
     def actual_hours(df, from_date):
         return df[df["Start"] >= pd.Timestamp(from_date)]["Duration"].sum()
 
-    # Compute quota summary for "sandisk"
+    # Compute quota summary for "sandisk". It always covers the current
+    # week and month, so it reads its own small slice.
     quota_html = ""
-    sandisk_df = df[df["Client"].str.lower() == "sandisk"]
+    today = pd.Timestamp.now().normalize()
+    start_of_week = today - pd.Timedelta(days=today.weekday())
+    start_of_month = today.replace(day=1)
+    sandisk_df = df.iloc[0:0]
+    if clients is None or "sandisk" in {client.lower() for client in clients}:
+        sandisk_df = add_duration(
+            load_sessions_frame(
+                clients=["sandisk"], start=min(start_of_week, start_of_month).date()
+            )
+        )
     if not sandisk_df.empty:
-        today = pd.Timestamp.now().normalize()
-        start_of_week = today - pd.Timedelta(days=today.weekday())
-        start_of_month = today.replace(day=1)
 
         # --- End of week: latest business day up to today ---
         week_range = pd.bdate_range(start=start_of_week, end=today)
@@ -135,8 +185,8 @@ def generate_report():
         week_hours = actual_hours(sandisk_df, start_of_week)
         month_hours = actual_hours(sandisk_df, start_of_month)
 
-        week_expected = expected_hours(start_of_week, end_of_week, "sandisk")
-        month_expected = expected_hours(start_of_month, end_of_month, "sandisk")
+        week_expected = expected_hours(start_of_week.date(), end_of_week, "sandisk")
+        month_expected = expected_hours(start_of_month.date(), end_of_month, "sandisk")
 
         quota_html = f"""
         <hr>
@@ -157,7 +207,7 @@ def generate_report():
         """
 
     # ----- Combine HTML report -----
-    html_path = Path("report.html")
+    html_path = Path(output_path)
     with open(html_path, "w", encoding="utf-8") as f:
         f.write(
             "<html><head><title>Time Tracking Report</title>"
@@ -175,15 +225,61 @@ def generate_report():
             ".summary-title {padding: 2em 0;}"
             "body { background: #181a20; }"
             "h3 { margin-top: 0; }"
+            ".streaks { border-collapse: collapse; margin-bottom: 24px; }"
+            ".streaks th, .streaks td { padding: 4px 16px; text-align: left; }"
+            ".streaks th { border-bottom: 1px solid #555; }"
             "</style>"
             "</head><body><div class='main-wrap'>\n"
         )
         f.write("<h3 style='font-family:sans-serif;'>Time Tracking Summary</h3>\n")
+        f.write(
+            f"<div style='font-size:13px;'>{describe_slice(clients, start, end)}</div>\n"
+        )
         f.write(quota_html)
-        f.write(fig_day.to_html(full_html=False, include_plotlyjs="cdn"))
-        f.write(fig_weekly.to_html(full_html=False, include_plotlyjs=False))
-        f.write(fig_monthly.to_html(full_html=False, include_plotlyjs=False))
-        f.write(fig_avg.to_html(full_html=False, include_plotlyjs=False))
+        for i, fig in enumerate(figs):
+            plotlyjs = "cdn" if i == 0 else False
+            f.write(fig.to_html(full_html=False, include_plotlyjs=plotlyjs))
+        f.write(streaks_html)
+        f.write(machines_html)
         f.write("</body></div></html>")
 
     print(f"✅ Report saved to {html_path.resolve()}")
+    return html_path
+
+
+def other_machine_hours(clients, start, end):
+    """Hours per machine and client in the slice, from the synced rollups."""
+    rollups = pd.DataFrame(
+        load_rollups(), columns=["machine", "client", "day", "hours"]
+    )
+    if clients is not None:
+        wanted = [client.lower() for client in clients]
+        rollups = rollups[rollups["client"].str.lower().isin(wanted)]
+    if start:
+        rollups = rollups[rollups["day"] >= str(pd.Timestamp(start).date())]
+    if end:
+        rollups = rollups[rollups["day"] <= str(pd.Timestamp(end).date())]
+    totals = rollups.groupby(["machine", "client"], as_index=False)["hours"].sum()
+    return totals.round(1).rename(columns=str.capitalize)
+
+
+def describe_slice(clients, start, end):
+    who = "All clients" if clients is None else ", ".join(clients) or "No clients"
+    if not start and not end:
+        return f"{who}, all time"
+    return f"{who}, {start or '…'} to {end or 'today'}"
+
+
+def generate_reports(specs):
+    """Write several reports at once, `specs` being generate_report kwargs.
+
+    The snapshot is refreshed once up front; each report then only reads
+    its own slice. Returns the written paths in order.
+    """
+    paths = [Path(spec.get("output_path", REPORT_FILE)).resolve() for spec in specs]
+    if len(set(paths)) != len(paths):
+        raise ValueError("Each report needs its own output_path.")
+
+    refresh_snapshot()
+    with ThreadPoolExecutor() as pool:
+        return list(pool.map(lambda spec: generate_report(**spec), specs))
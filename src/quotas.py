@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from settings import CLIENT_QUOTAS, HOLIDAY_FILE
+
+
+def load_holidays():
+    holidays = set()
+    holidays_path = Path(HOLIDAY_FILE)
+    if holidays_path.exists():
+        with open(holidays_path) as f:
+            holidays = {
+                datetime.strptime(line.strip().split()[0], "%Y-%m-%d").date()
+                for line in f
+                if line.strip() and not line.startswith("#")
+            }
+    return holidays
+
+
+def expected_hours(start_date, end_date, client, holidays=None):
+    """Quota hours for `client` on business days from start_date to end_date inclusive."""
+    quota_cfg = CLIENT_QUOTAS.get(client.lower())
+    if not quota_cfg:
+        return 0
+
+    weekly_quota = quota_cfg["weekly_schedule"]
+    if holidays is None:
+        holidays = load_holidays()
+
+    total = 0.0
+    day = start_date
+    while day <= end_date:
+        weekday = day.weekday()
+        # Weekends are never workdays, whatever the schedule says
+        if weekday < 5 and day not in holidays and weekday in weekly_quota:
+            total += weekly_quota[weekday]
+        day += timedelta(days=1)
+
+    return total
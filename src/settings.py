@@ -22,4 +22,13 @@ CLIENT_QUOTAS = {
     # }
 }
 
+SESSIONS_FILE = "sessions.csv"
+ARCHIVE_FILE = "sessions_archive.csv"
+PENDING_WRITES_FILE = "pending_writes.jsonl"
+INSTANCE_LOCK_FILE = "ttrack.lock"
 HOLIDAY_FILE = "holidays.txt"
+
+# Central sync (see sync.py / sync_server.py), disabled while SYNC_URL is None
+SYNC_URL = None  # e.g. "http://127.0.0.1:8765"
+SYNC_INTERVAL = 300  # seconds between syncs
+SYNC_MACHINE_ID = None  # defaults to the host name
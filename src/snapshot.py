@@ -0,0 +1,256 @@
+"""Typed columnar snapshot of sessions.csv for the report reader.
+
+sessions.csv stays the human-editable source of truth. Next to it we keep
+Arrow IPC files under .cache/snapshot/: a base file plus small delta files
+for rows appended since, folded back into the base once there are more
+than MAX_DELTAS of them. Files are memory-mapped on read, so loading is
+zero-copy up to the final pandas conversion.
+
+The base file is kept sorted by Start, so a date range is cut out of it
+with a binary search and a zero-copy slice; only that slice is converted.
+
+Any change other than an append (an edit, a compaction, a hand sort in
+Excel) is detected from a hash of the consumed part of the CSV and
+triggers a full rebuild. The hash is only recomputed once the file's size
+or mtime changed. Without pyarrow the report just parses the CSV.
+"""
+
+import json
+import os
+import threading
+from datetime import timedelta
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from filestate import complete_lines, file_stat, fingerprint
+from settings import SESSIONS_FILE
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # Optional, load_sessions_frame falls back to read_csv
+    pa = None
+
+SNAPSHOT_FOLDER = Path(".cache") / "snapshot"
+BASE_FILE = SNAPSHOT_FOLDER / "base.arrow"
+META_FILE = SNAPSHOT_FOLDER / "meta.json"
+SNAPSHOT_VERSION = 2  # Bump to force a rebuild after a layout change
+MAX_DELTAS = 8
+COLUMNS = ["Client", "Start", "End"]
+
+_lock = threading.Lock()
+
+
+def _schema():
+    return pa.schema(
+        [
+            ("Client", pa.string()),
+            ("Start", pa.timestamp("us")),
+            ("End", pa.timestamp("us")),
+        ]
+    )
+
+
+def _parse(data, header):
+    read_options = pa_csv.ReadOptions(
+        column_names=None if header else COLUMNS,
+        autogenerate_column_names=False,
+    )
+    convert_options = pa_csv.ConvertOptions(
+        column_types=dict(zip(_schema().names, _schema().types))
+    )
+    return pa_csv.read_csv(
+        pa.BufferReader(data),
+        read_options=read_options,
+        convert_options=convert_options,
+    ).select(COLUMNS)
+
+
+def _write_table(table, path):
+    tmp_file = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp_file), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_file, path)
+
+
+def _read_table(path, mmap=True):
+    source = pa.memory_map(str(path), "r") if mmap else pa.OSFile(str(path), "rb")
+    return pa.ipc.open_file(source).read_all()
+
+
+def _load_meta():
+    try:
+        return json.loads(META_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _save_meta(meta):
+    tmp_file = META_FILE.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(meta))
+    os.replace(tmp_file, META_FILE)
+
+
+def _rebuild(f, stat):
+    f.seek(0)
+    data = complete_lines(f.read())
+    table = _parse(data, header=True) if data else _schema().empty_table()
+    _write_table(table.sort_by("Start"), BASE_FILE)
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "offset": len(data),
+        "fingerprint": fingerprint(f, len(data)),
+        "stat": stat,
+        "deltas": [],
+        "next_delta": 1,
+    }
+    _save_meta(meta)
+    return meta
+
+
+def _append_delta(f, meta):
+    f.seek(meta["offset"])
+    data = complete_lines(f.read())
+    if not data:
+        return meta
+
+    delta_name = f"delta-{meta['next_delta']:04d}.arrow"
+    _write_table(_parse(data, header=False), SNAPSHOT_FOLDER / delta_name)
+    offset = meta["offset"] + len(data)
+    meta = dict(
+        meta,
+        offset=offset,
+        fingerprint=fingerprint(f, offset),
+        deltas=meta["deltas"] + [delta_name],
+        next_delta=meta["next_delta"] + 1,
+    )
+    _save_meta(meta)
+    return meta
+
+
+def _compact(meta):
+    # Read without mapping, the base file is about to be replaced
+    table = _load_tables(meta, mmap=False).sort_by("Start")
+    _write_table(table, BASE_FILE)
+    old_deltas = meta["deltas"]
+    meta = dict(meta, deltas=[])
+    _save_meta(meta)
+    for name in old_deltas:
+        try:
+            (SNAPSHOT_FOLDER / name).unlink()
+        except OSError:
+            pass  # Still mapped somewhere, no longer referenced by meta
+    return meta
+
+
+def compact_snapshot():
+    """Fold the delta files into the base file."""
+    with _lock:
+        meta = _load_meta()
+        if meta and meta["deltas"]:
+            meta = _compact(meta)
+        return meta
+
+
+def _load_tables(meta, mmap=True):
+    tables = [_read_table(BASE_FILE, mmap)]
+    tables += [_read_table(SNAPSHOT_FOLDER / name, mmap) for name in meta["deltas"]]
+    return pa.concat_tables(tables)
+
+
+def refresh_snapshot(csv_path=SESSIONS_FILE):
+    """Bring the snapshot up to date with sessions.csv and return its meta."""
+    if pa is None or not Path(csv_path).exists():
+        return None
+    with _lock, open(csv_path, "rb") as f:
+        SNAPSHOT_FOLDER.mkdir(parents=True, exist_ok=True)
+        stat = file_stat(f)
+        size = stat[0]
+        meta = _load_meta()
+
+        appended_only = (
+            meta is not None
+            and meta.get("version") == SNAPSHOT_VERSION
+            and BASE_FILE.exists()
+            and size >= meta["offset"]
+            and (
+                meta.get("stat") == stat
+                or fingerprint(f, meta["offset"]) == meta["fingerprint"]
+            )
+        )
+        if not appended_only:
+            return _rebuild(f, stat)
+
+        if size > meta["offset"]:
+            meta = _append_delta(f, meta)
+        if len(meta["deltas"]) > MAX_DELTAS:
+            meta = _compact(meta)
+        if meta.get("stat") != stat:
+            meta = dict(meta, stat=stat)
+            _save_meta(meta)
+        return meta
+
+
+def _bounds(start, end):
+    """Turn an inclusive date range into [lower, upper) datetime64 bounds."""
+    lower = np.datetime64(start, "us") if start else None
+    upper = np.datetime64(end + timedelta(days=1), "us") if end else None
+    return lower, upper
+
+
+def _slice_sorted(table, lower, upper):
+    starts = table.column("Start").to_numpy()
+    lo = np.searchsorted(starts, lower) if lower is not None else 0
+    hi = np.searchsorted(starts, upper) if upper is not None else len(starts)
+    return table.slice(lo, hi - lo)
+
+
+def _filter_range(table, lower, upper):
+    if lower is not None:
+        table = table.filter(pc.greater_equal(table["Start"], pa.scalar(lower)))
+    if upper is not None:
+        table = table.filter(pc.less(table["Start"], pa.scalar(upper)))
+    return table
+
+
+def load_snapshot(csv_path=SESSIONS_FILE, clients=None, start=None, end=None):
+    """Refresh and memory-map the snapshot as a pyarrow Table.
+
+    `clients` (case-insensitive) and the inclusive `start`/`end` dates
+    restrict the result to that slice before anything is materialised.
+    """
+    meta = refresh_snapshot(csv_path)
+    if meta is None:
+        return _schema().empty_table()
+
+    lower, upper = _bounds(start, end)
+    with _lock:
+        tables = [_slice_sorted(_read_table(BASE_FILE), lower, upper)]
+        tables += [
+            _filter_range(_read_table(SNAPSHOT_FOLDER / name), lower, upper)
+            for name in meta["deltas"]
+        ]
+    table = pa.concat_tables(tables)
+
+    if clients is not None:
+        wanted = pa.array([client.lower() for client in clients], type=pa.string())
+        table = table.filter(pc.is_in(pc.utf8_lower(table["Client"]), wanted))
+    return table
+
+
+def load_sessions_frame(csv_path=SESSIONS_FILE, clients=None, start=None, end=None):
+    """Sessions as a DataFrame with parsed Start/End, from the snapshot if possible."""
+    if pa is not None:
+        return load_snapshot(csv_path, clients, start, end).to_pandas()
+
+    df = pd.read_csv(csv_path, parse_dates=["Start", "End"])
+    lower, upper = _bounds(start, end)
+    if lower is not None:
+        df = df[df["Start"] >= lower]
+    if upper is not None:
+        df = df[df["Start"] < upper]
+    if clients is not None:
+        df = df[df["Client"].str.lower().isin([client.lower() for client in clients])]
+    return df.reset_index(drop=True)
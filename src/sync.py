@@ -0,0 +1,263 @@
+"""Batched delta sync of sessions.csv to a central store.
+
+Each machine keeps a high-water mark in .sync/state.json: the byte offset
+of sessions.csv already pushed (with a hash of that prefix and the file's
+size and mtime, see filestate.py) and a ledger of pushed session ids and
+digests. A sync then reads nothing while the file is unchanged, and
+otherwise only
+
+- the rows appended since the mark, when the file only grew, or
+- the whole file, diffed against the ledger, after any other change
+  (edit, compaction), so edited sessions are re-pushed and removed ones
+  are sent as deletes.
+
+Changes go out in gzip-compressed batches. Every item carries the
+machine's sync revision, and the server keeps the highest (rev, digest)
+per session, so retries and out-of-order batches resolve the same way
+everywhere. Revisions follow the wall clock, so they keep growing even
+if .sync/ is lost; items the server still rejects as older are retried
+above the highest revision it reports. Afterwards the other machines' per-day rollups are pulled into
+.sync/rollups.json, which the stats report shows. SyncWorker repeats this
+off the GUI thread and backs off while the server is unreachable.
+
+    python sync.py --url http://127.0.0.1:8765
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from filestate import complete_lines, file_stat, fingerprint
+from settings import SESSIONS_FILE, SYNC_INTERVAL, SYNC_MACHINE_ID, SYNC_URL
+
+SYNC_FOLDER = Path(".sync")
+STATE_FILE = SYNC_FOLDER / "state.json"
+ROLLUPS_FILE = SYNC_FOLDER / "rollups.json"
+BATCH_SIZE = 500
+REQUEST_TIMEOUT = 30  # seconds
+BACKOFF_BASE = 5  # seconds, doubled per failed attempt
+BACKOFF_MAX = 15 * 60
+
+
+def machine_id():
+    return SYNC_MACHINE_ID or platform.node()
+
+
+def session_id(client, start):
+    return hashlib.sha1(f"{client}|{start}".encode()).hexdigest()[:16]
+
+
+def session_digest(client, start, end):
+    return hashlib.sha1(f"{client}|{start}|{end}".encode()).hexdigest()[:16]
+
+
+def _write_json(path, data):
+    SYNC_FOLDER.mkdir(exist_ok=True)
+    tmp_file = path.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(data))
+    os.replace(tmp_file, path)
+
+
+def load_state():
+    try:
+        return json.loads(STATE_FILE.read_text())
+    except (OSError, ValueError):
+        return {"offset": 0, "fingerprint": None, "stat": None, "rev": 0, "ledger": {}}
+
+
+def load_rollups():
+    """Per-day hours of the other machines, as pulled by the last sync."""
+    try:
+        return json.loads(ROLLUPS_FILE.read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def _pulled_at():
+    try:
+        return ROLLUPS_FILE.stat().st_mtime
+    except OSError:
+        return 0
+
+
+def collect_changes(state, path=SESSIONS_FILE):
+    """Return (upserts, deletes, mark), mark being the new high-water mark."""
+    with open(path, "rb") as f:
+        stat = file_stat(f)
+        appended_only = (
+            state["fingerprint"] is not None
+            and stat[0] >= state["offset"]
+            and (
+                state.get("stat") == stat
+                or fingerprint(f, state["offset"]) == state["fingerprint"]
+            )
+        )
+        start_offset = state["offset"] if appended_only else 0
+        f.seek(start_offset)
+        data = complete_lines(f.read())
+        offset = start_offset + len(data)
+        if appended_only and not data:
+            new_fingerprint = state["fingerprint"]
+        else:
+            new_fingerprint = fingerprint(f, offset)
+    mark = {"offset": offset, "fingerprint": new_fingerprint, "stat": stat}
+
+    current = {}
+    for row in csv.reader(io.StringIO(data.decode("utf-8"), newline="")):
+        if len(row) < 3 or row[0] == "Client":
+            continue
+        client, start, end = row[:3]
+        current[session_id(client, start)] = {
+            "id": session_id(client, start),
+            "client": client,
+            "start": start,
+            "end": end,
+            "digest": session_digest(client, start, end),
+        }
+
+    ledger = state["ledger"]
+    upserts = [s for sid, s in current.items() if ledger.get(sid) != s["digest"]]
+    deletes = [] if appended_only else [sid for sid in ledger if sid not in current]
+    return upserts, deletes, mark
+
+
+def _request(url, body=None):
+    headers = {"Accept-Encoding": "gzip"}
+    if body is not None:
+        body = gzip.compress(json.dumps(body).encode())
+        headers.update({"Content-Type": "application/json", "Content-Encoding": "gzip"})
+    request = urllib.request.Request(url, data=body, headers=headers)
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        data = response.read()
+        if response.headers.get("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def sync_once(url=SYNC_URL, machine=None, path=SESSIONS_FILE, pull_interval=0):
+    """Push local changes, pull the other machines' rollups, return counts.
+
+    With nothing to push, the rollups are only pulled again once
+    `pull_interval` seconds have passed since the last pull.
+    """
+    machine = machine or machine_id()
+    url = url.rstrip("/")
+    state = load_state()
+    upserts, deletes, mark = collect_changes(state, path)
+
+    if upserts or deletes:
+        # Milliseconds, so a lost state file does not restart the count
+        state["rev"] = max(state["rev"] + 1, time.time_ns() // 1_000_000)
+        _write_json(STATE_FILE, state)
+    rev = state["rev"]
+
+    def push(changes):
+        reply = _request(f"{url}/push", {"machine": machine, "rev": rev, **changes})
+        state["rev"] = max(state["rev"], reply.get("rev") or 0)
+        return set(reply.get("rejected", []))
+
+    # The ledger is saved after every acknowledged batch, so an interrupted
+    # sync resumes where it stopped. Rejected items stay out of it.
+    rejected = set()
+    for i in range(0, len(upserts), BATCH_SIZE):
+        batch = upserts[i : i + BATCH_SIZE]
+        rejected |= push({"upserts": batch})
+        for session in batch:
+            if session["id"] not in rejected:
+                state["ledger"][session["id"]] = session["digest"]
+        _write_json(STATE_FILE, state)
+    for i in range(0, len(deletes), BATCH_SIZE):
+        batch = deletes[i : i + BATCH_SIZE]
+        rejected |= push({"deletes": batch})
+        for sid in batch:
+            if sid not in rejected:
+                del state["ledger"][sid]
+        _write_json(STATE_FILE, state)
+    if rejected:
+        mark["fingerprint"] = None  # Diff the whole file again next time
+
+    if any(state.get(key) != value for key, value in mark.items()):
+        state.update(mark)
+        _write_json(STATE_FILE, state)
+
+    counts = {
+        "pushed": len(upserts),
+        "deleted": len(deletes),
+        "rejected": len(rejected),
+        "rollups": None,
+    }
+    if not (upserts or deletes) and time.time() - _pulled_at() < pull_interval:
+        return counts
+    query = urllib.parse.urlencode({"exclude": machine})
+    rollups = _request(f"{url}/rollups?{query}")
+    _write_json(ROLLUPS_FILE, rollups)
+    counts["rollups"] = len(rollups)
+    return counts
+
+
+class SyncWorker(threading.Thread):
+    """Runs sync_once every `interval` seconds, backing off while offline."""
+
+    def __init__(self, url=SYNC_URL, interval=SYNC_INTERVAL):
+        super().__init__(name="ttrack-sync", daemon=True)
+        self.url = url
+        self.interval = interval
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.last_error = None
+
+    def kick(self):
+        """Sync now instead of waiting for the next interval."""
+        self.wakeup.set()
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+
+    def run(self):
+        failures = 0
+        while not self.stopping:
+            try:
+                sync_once(self.url, pull_interval=self.interval)
+            except (OSError, ValueError) as e:  # Offline, server down, bad reply
+                self.last_error = e
+                failures += 1
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (failures - 1))
+                delay *= random.uniform(0.5, 1.0)  # Don't retry in lockstep
+            else:
+                self.last_error = None
+                failures = 0
+                delay = self.interval
+            self.wakeup.wait(delay)
+            self.wakeup.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync sessions.csv once.")
+    parser.add_argument("--url", default=SYNC_URL, required=SYNC_URL is None)
+    parser.add_argument("--machine", default=None, help="defaults to the host name")
+    args = parser.parse_args(argv)
+
+    counts = sync_once(args.url, args.machine)
+    print(
+        f"✅ Pushed {counts['pushed']} session(s), {counts['deleted']} delete(s); "
+        f"pulled {counts['rollups']} rollup row(s) from other machines"
+    )
+    if counts["rejected"]:
+        print(
+            f"⚠️ {counts['rejected']} change(s) rejected as outdated, retried next sync"
+        )
+
+
+if __name__ == "__main__":
+    main()
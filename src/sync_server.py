@@ -0,0 +1,157 @@
+"""Reference sync server: SQLite behind a small local HTTP endpoint.
+
+Good enough for a team on one network and for testing sync.py end to end
+on a single box; a real deployment can put any store behind the same two
+endpoints:
+
+    POST /push     gzip JSON {machine, rev, upserts: [...], deletes: [...]},
+                   answers {accepted, rejected: [ids], rev: highest stored}
+    GET  /rollups  per machine/client/day hours, ?exclude=<machine>
+
+    python sync_server.py --db sync.db --port 8765
+"""
+
+import argparse
+import gzip
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    machine TEXT NOT NULL,
+    id TEXT NOT NULL,
+    client TEXT,
+    start_at TEXT,
+    end_at TEXT,
+    rev INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (machine, id)
+);
+"""
+
+# Conflicts resolve to the highest (rev, digest), whatever the arrival order;
+# an identical retry is applied again so it is not reported as rejected
+UPSERT = """
+INSERT INTO sessions (machine, id, client, start_at, end_at, rev, digest, deleted)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (machine, id) DO UPDATE SET
+    client = excluded.client,
+    start_at = excluded.start_at,
+    end_at = excluded.end_at,
+    rev = excluded.rev,
+    digest = excluded.digest,
+    deleted = excluded.deleted
+WHERE (excluded.rev, excluded.digest) >= (sessions.rev, sessions.digest)
+"""
+
+LATEST_REV = "SELECT MAX(rev) FROM sessions WHERE machine = ?"
+
+ROLLUPS = """
+SELECT machine, client, substr(start_at, 1, 10) AS day,
+       SUM((julianday(end_at) - julianday(start_at)) * 24) AS hours
+FROM sessions
+WHERE deleted = 0 AND machine != ?
+GROUP BY machine, client, day
+ORDER BY machine, client, day
+"""
+
+
+class SyncStore:
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def push(self, payload):
+        machine = payload["machine"]
+        rev = int(payload["rev"])
+        rows = [
+            (machine, s["id"], s["client"], s["start"], s["end"], rev, s["digest"], 0)
+            for s in payload.get("upserts", [])
+        ]
+        # Tombstones, so a late retry of an older upsert cannot resurrect a row
+        rows += [
+            (machine, sid, None, None, None, rev, "", 1)
+            for sid in payload.get("deletes", [])
+        ]
+        # Items older than what is stored are reported back, with the
+        # machine's highest stored rev, so the client retries them above it
+        rejected = []
+        with self.lock, self.db:
+            for row in rows:
+                if self.db.execute(UPSERT, row).rowcount == 0:
+                    rejected.append(row[1])
+            (latest,) = self.db.execute(LATEST_REV, (machine,)).fetchone()
+        return {
+            "accepted": len(rows) - len(rejected),
+            "rejected": rejected,
+            "rev": latest,
+        }
+
+    def rollups(self, exclude=""):
+        with self.lock:
+            cursor = self.db.execute(ROLLUPS, (exclude,))
+            return [
+                {"machine": m, "client": c, "day": d, "hours": round(h, 4)}
+                for m, c, d, h in cursor
+            ]
+
+
+class SyncHandler(BaseHTTPRequestHandler):
+    def send_json(self, data, status=200):
+        body = gzip.compress(json.dumps(data).encode())
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/push":
+            return self.send_json({"error": "not found"}, 404)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            result = self.server.store.push(json.loads(body))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            return self.send_json({"error": str(e)}, 400)
+        self.send_json(result)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/rollups":
+            return self.send_json({"error": "not found"}, 404)
+        exclude = parse_qs(url.query).get("exclude", [""])[0]
+        self.send_json(self.server.store.rollups(exclude))
+
+
+def make_server(db_path, host="127.0.0.1", port=8765):
+    server = ThreadingHTTPServer((host, port), SyncHandler)
+    server.store = SyncStore(db_path)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the reference sync server.")
+    parser.add_argument("--db", default="sync.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.db, args.host, args.port)
+    print(f"Sync server on http://{args.host}:{server.server_port} ({args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()